@@ -3,9 +3,12 @@
 
 from flask import Blueprint, request, make_response
 from google.cloud import datastore
+from google.api_core.exceptions import BadRequest
 import json
+import base64
+from six.moves.urllib.parse import quote_plus
 from utils import make_error, AuthError, verify_jwt
-from loan import is_item_available
+from loan import is_item_available, item_loans_query, count_item_loans
 
 client = datastore.Client()
 
@@ -238,3 +241,56 @@ def handle_single_item_request(item_id):
             return (make_error("Server only accepts application/json data."), 415)
     else:
         return (make_error('Method not recogonized'), 404)
+
+
+@bp.route('/<item_id>/loans', methods=['GET'])
+def handle_item_loans_request(item_id):
+    # View an item's loan history (only allowed by item owner)
+    if 'application/json' in request.accept_mimetypes:
+        payload = verify_jwt(request)
+        # Check ownership once for the whole history
+        items_key = client.key("items", int(item_id))
+        item = client.get(key=items_key)
+        if item:
+            if item["owner"] == payload["sub"]:
+                # Summary: counts by end type, open loans under "open"
+                if request.args.get('summary') == 'true':
+                    counts = count_item_loans(item_id)
+                    output = {end_type or "open": count for end_type, count in counts.items()}
+                    output["total"] = sum(counts.values())
+                else:
+                    # Paginate with cursors
+                    q_limit = int(request.args.get('limit', '5'))
+                    q_cursor = request.args.get('cursor')
+                    # Reject truncated or tampered cursors (the library
+                    # would fail decoding them inside the page iterator)
+                    if q_cursor is not None:
+                        try:
+                            base64.urlsafe_b64decode(q_cursor.encode('utf-8'))
+                        except ValueError:
+                            return (make_error("Invalid cursor"), 400)
+                    l_iterator = item_loans_query(item_id).fetch(limit=q_limit, start_cursor=q_cursor)
+                    pages = l_iterator.pages
+                    try:
+                        loans = list(next(pages))
+                    except BadRequest:
+                        # Well-formed base64 that Datastore does not accept
+                        return (make_error("Invalid cursor"), 400)
+                    loans_url = request.host_url + 'loans/'
+                    for loan in loans:
+                        loan["id"] = loan.key.id
+                        loan["self"] = loans_url + str(loan.key.id)
+                    output = {'loans': loans}
+                    if l_iterator.next_page_token:
+                        next_cursor = l_iterator.next_page_token.decode('utf-8')
+                        output["next"] = request.base_url + "?limit=" + str(q_limit) + "&cursor=" + quote_plus(next_cursor)
+                res = make_response(json.dumps(output))
+                res.mimetype = 'application/json'
+                res.status_code = 200
+                return res
+            else:
+                return (make_error('Item not owned'), 403)
+        else:
+            return (make_error('No item with this item_id exists'), 404)
+    else:
+        return (make_error("Not Acceptable"), 406)
@@ -23,9 +23,12 @@ def is_valid_date(date: str):
         return False
 
 
+END_TYPES = ('returned', 'replaced', 'paid', 'forgiven')
+
+
 def is_valid_end_type(end_type):
     '''End type must be valid option'''
-    return end_type in {'returned', 'replaced', 'paid', 'forgiven'}
+    return end_type in END_TYPES
 
 
 # Helpers for checking loan status
@@ -40,6 +43,35 @@ def is_item_available(item_id):
     return False
 
 
+# Helpers for item loan history
+
+def item_loans_query(item_id):
+    '''Loans of an item, oldest first (uses the item/start_date index)'''
+    query = client.query(kind="loans")
+    query.add_filter("item", "=", int(item_id))
+    query.order = ["start_date"]
+    return query
+
+
+def count_item_loans(item_id):
+    '''Count an item's loans by end type (None for open loans)
+    without fetching the loan entities'''
+    # Datastore aggregations cannot group by a property, so this makes one
+    # count query per end type (len(END_TYPES) + 1 serial calls)
+    counts = {}
+    for end_type in END_TYPES + (None,):
+        query = client.query(kind="loans")
+        query.add_filter("item", "=", int(item_id))
+        # Open loans only match None because handle_loans_request stores
+        # "end_type": None explicitly; a loan missing the property would
+        # not be counted
+        query.add_filter("end_type", "=", end_type)
+        agg_query = client.aggregation_query(query).count()
+        result = list(agg_query.fetch())
+        counts[end_type] = result[0][0].value if result else 0
+    return counts
+
+
 # Routes
 
 @bp.route('', methods=['POST', 'GET'])
@@ -9,7 +9,7 @@ import json
 from flask import Flask, jsonify, redirect, render_template, session, url_for, request, make_response
 from google.cloud import datastore
 from six.moves.urllib.parse import urlencode, quote_plus
-from utils import CLIENT_ID, DOMAIN, oauth, AuthError, verify_jwt, make_error
+from utils import CLIENT_ID, DOMAIN, oauth, AuthError, verify_jwt, make_error, get_jwks
 import item
 import loan
 
@@ -37,6 +37,26 @@ def home():
     )
 
 
+# App Engine warmup request (see inbound_services in app.yaml). Do the
+# expensive one-time setup here so it is not paid by the first real request.
+@app.route('/_ah/warmup')
+def warmup():
+    # Fetch and cache the signing keys used by verify_jwt
+    get_jwks()
+    # Load the Auth0 OpenID configuration used by login/callback
+    oauth.auth0.load_server_metadata()
+    # Compile the home page template
+    app.jinja_env.get_template("home.html")
+    # main, item and loan each have their own Datastore client, so open
+    # every connection
+    # with a cheap keys-only query
+    for ds_client in (client, item.client, loan.client):
+        query = ds_client.query(kind="users")
+        query.keys_only()
+        list(query.fetch(limit=1))
+    return ('', 200)
+
+
 # Decode the JWT supplied in the Authorization header
 @app.route('/decode', methods=['GET'])
 def decode_jwt():
@@ -97,4 +117,6 @@ def users_get():
         return (make_error("Not Acceptable"), 406)
 
 if __name__ == '__main__':
+    # Local development only; App Engine serves the app with gunicorn
+    # using the entrypoint in app.yaml
     app.run(host='127.0.0.1', port=8080, debug=True)
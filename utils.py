@@ -6,16 +6,12 @@
 """Helpful utilities for errors and authorization"""
 
 import json
-from google.cloud import datastore
 from flask import current_app as app
 from six.moves.urllib.request import urlopen
 from jose import jwt
 from authlib.integrations.flask_client import OAuth
 
 
-client = datastore.Client()
-
-
 def make_error(error_str):
     """Create the error object"""
     return json.dumps({"Error": error_str})
@@ -43,6 +39,34 @@ auth0 = oauth.register(
     server_metadata_url=f'https://{DOMAIN}/.well-known/openid-configuration'
 )
 
+# Cache the JWKS so the signing keys are only fetched once per instance
+# instead of on every authenticated request
+_jwks = None
+
+
+def get_jwks(refresh=False):
+    """Return the Auth0 JWKS, fetching it if not already cached"""
+    global _jwks
+    if _jwks is None or refresh:
+        jsonurl = urlopen("https://"+ DOMAIN+"/.well-known/jwks.json")
+        _jwks = json.loads(jsonurl.read())
+    return _jwks
+
+
+def find_rsa_key(jwks, kid):
+    """Return the RSA key in the JWKS matching kid (empty if none)"""
+    rsa_key = {}
+    for key in jwks["keys"]:
+        if key["kid"] == kid:
+            rsa_key = {
+                "kty": key["kty"],
+                "kid": key["kid"],
+                "use": key["use"],
+                "n": key["n"],
+                "e": key["e"]
+            }
+    return rsa_key
+
 # This code is adapted from https://auth0.com/docs/quickstart/backend/python/01-authorization?_ga=2.46956069.349333901.1589042886-466012638.1589042885#create-the-jwt-validation-decorator
 
 class AuthError(Exception):
@@ -59,9 +83,7 @@ def verify_jwt(request):
         raise AuthError({"code": "no auth header",
                             "description":
                                 "Authorization header is missing"}, 401)
-    
-    jsonurl = urlopen("https://"+ DOMAIN+"/.well-known/jwks.json")
-    jwks = json.loads(jsonurl.read())
+
     try:
         unverified_header = jwt.get_unverified_header(token)
     except jwt.JWTError:
@@ -74,16 +96,10 @@ def verify_jwt(request):
                         "description":
                             "Invalid header. "
                             "Use an RS256 signed JWT Access Token"}, 401)
-    rsa_key = {}
-    for key in jwks["keys"]:
-        if key["kid"] == unverified_header["kid"]:
-            rsa_key = {
-                "kty": key["kty"],
-                "kid": key["kid"],
-                "use": key["use"],
-                "n": key["n"],
-                "e": key["e"]
-            }
+    rsa_key = find_rsa_key(get_jwks(), unverified_header["kid"])
+    if not rsa_key:
+        # The keys may have been rotated since they were cached
+        rsa_key = find_rsa_key(get_jwks(refresh=True), unverified_header["kid"])
     if rsa_key:
         try:
             payload = jwt.decode(